@@ -1,39 +1,119 @@
+import asyncio
+import functools
 import logging
+import os
+import re
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from bson import ObjectId
+from bson.regex import Regex
 from models import ProductionItem
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from pymongo.errors import DuplicateKeyError
+from pydantic import TypeAdapter
+from pymongo import UpdateOne
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
 
 logger = logging.getLogger(__name__)
 
+_ITEMS_ADAPTER = TypeAdapter(List[ProductionItem])
 
-async def create_indexes(db: AsyncIOMotorDatabase) -> None:
+# Bulk upsert tuning: items per bulk_write and max chunks in flight
+INSERT_BATCH_SIZE = int(os.getenv("INSERT_BATCH_SIZE", "500"))
+INSERT_CONCURRENCY = int(os.getenv("INSERT_CONCURRENCY", "4"))
+
+# Statuses of items still moving through production; completed and delayed
+# items are excluded from the active_status_id partial index
+ACTIVE_STATUSES = ["pending", "in_production"]
+
+# How long cached LLM extractions are kept
+EXTRACTION_CACHE_TTL_SECONDS = int(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Fields rendered by the dashboard's item list
+LIST_PROJECTION = {
+    "order_number": 1,
+    "style": 1,
+    "fabric": 1,
+    "color": 1,
+    "quantity": 1,
+    "status": 1,
+    "dates": 1,
+    "created_at": 1,
+}
+
+# Lowercased copies of style / order_number used only for prefix filters
+SHADOW_FIELDS_PROJECTION = {"style_lc": 0, "order_number_lc": 0}
+
+# Newest first, with _id as a stable tiebreaker for keyset pagination
+PAGE_SORT = [("created_at", -1), ("_id", -1)]
+
+# Index to hint for counts filtered on a single field (status: see _status_hint)
+COUNT_HINTS = {
+    "style_lc": "style_lc_1",
+    "order_number_lc": "order_created_id",
+}
+
+
+async def _drop_index_if_exists(collection: AsyncCollection, name: str) -> None:
+    """
+    Drop an index that a newer definition supersedes, ignoring missing ones.
+    
+    Args:
+        collection: Collection owning the index
+        name: Name of the index to drop
+    """
+    try:
+        await collection.drop_index(name)
+        logger.info(f"✓ Dropped superseded index '{name}'")
+    except OperationFailure:
+        logger.debug(f"Index '{name}' not present, nothing to drop")
+
+
+async def create_indexes(db: AsyncDatabase) -> None:
     """
-    Create MongoDB indexes for the production_items collection.
+    Create MongoDB indexes for the production_items and extraction_cache collections.
     
     Indexes:
     - order_number: Single field index for lookups
-    - status: Single field index for filtering
     - (order_number, color): Unique compound index for deduplication
-    - created_at: Descending index for sorting by recency
+    - style_lc: Lowercased shadow field for style prefix filters
+    - (status, created_at DESC, _id DESC): Status filter with the page sort
+    - (status, created_at DESC, _id DESC) over active statuses: Partial index
+      kept small for the pending/in_production dashboard views
+    - (order_number_lc, created_at DESC, _id DESC): Order number prefix filter
+      with the page sort
+    - (created_at DESC, _id DESC): Recency sort and keyset pagination
+    - extraction_cache.created_at: TTL index expiring cached LLM extractions
+    
+    Also backfills the style_lc / order_number_lc shadow fields on items
+    stored before they existed, so filters match them too. The backfill
+    only touches documents missing the fields and is a no-op once done.
     
     Args:
-        db: AsyncIOMotorDatabase instance
+        db: AsyncDatabase instance
     """
     collection = db.production_items
     
     logger.info("Creating MongoDB indexes for production_items collection...")
     
     try:
+        backfill = await collection.update_many(
+            {"$or": [
+                {"style_lc": {"$exists": False}},
+                {"order_number_lc": {"$exists": False}}
+            ]},
+            [{"$set": {
+                "style_lc": {"$toLower": "$style"},
+                "order_number_lc": {"$toLower": "$order_number"}
+            }}]
+        )
+        if backfill.modified_count:
+            logger.info(f"✓ Backfilled filter fields on {backfill.modified_count} items")
+        
         await collection.create_index("order_number")
         logger.info("✓ Created index on 'order_number'")
         
-        await collection.create_index("status")
-        logger.info("✓ Created index on 'status'")
-        
         await collection.create_index(
             [("order_number", 1), ("color", 1)],
             unique=True,
@@ -41,8 +121,53 @@ async def create_indexes(db: AsyncIOMotorDatabase) -> None:
         )
         logger.info("✓ Created unique compound index on (order_number, color)")
         
-        await collection.create_index([("created_at", -1)])
-        logger.info("✓ Created descending index on 'created_at'")
+        await collection.create_index("style_lc")
+        logger.info("✓ Created index on 'style_lc'")
+        
+        # Each filtered index ends in the full PAGE_SORT so filtered lists
+        # are returned in index order instead of sorted in memory
+        await collection.create_index(
+            [("status", 1), ("created_at", -1), ("_id", -1)],
+            name="status_created_id"
+        )
+        logger.info("✓ Created compound index on (status, created_at DESC, _id DESC)")
+        
+        await collection.create_index(
+            [("status", 1), ("created_at", -1), ("_id", -1)],
+            name="active_status_id",
+            partialFilterExpression={"status": {"$in": ACTIVE_STATUSES}}
+        )
+        logger.info(f"✓ Created partial index on (status, created_at DESC, _id DESC) for {ACTIVE_STATUSES}")
+        
+        await collection.create_index(
+            [("order_number_lc", 1), ("created_at", -1), ("_id", -1)],
+            name="order_created_id"
+        )
+        logger.info("✓ Created compound index on (order_number_lc, created_at DESC, _id DESC)")
+        
+        # Superseded by the status_created_id / order_created_id prefixes
+        await _drop_index_if_exists(collection, "status_1")
+        await _drop_index_if_exists(collection, "order_number_lc_1")
+        await _drop_index_if_exists(collection, "status_created")
+        await _drop_index_if_exists(collection, "active_status")
+        await _drop_index_if_exists(collection, "order_created")
+        
+        await collection.create_index(
+            [("created_at", -1), ("_id", -1)],
+            name="created_id"
+        )
+        logger.info("✓ Created compound index on (created_at DESC, _id DESC)")
+        
+        # Superseded by created_id, which carries the full page sort
+        await _drop_index_if_exists(collection, "created_at_-1")
+        await _drop_index_if_exists(collection, "created_status")
+        
+        await db.extraction_cache.create_index(
+            "created_at",
+            expireAfterSeconds=EXTRACTION_CACHE_TTL_SECONDS,
+            name="extraction_cache_ttl"
+        )
+        logger.info(f"✓ Created TTL index on extraction_cache ({EXTRACTION_CACHE_TTL_SECONDS}s)")
         
         logger.info("All indexes created successfully")
         
@@ -50,139 +175,341 @@ async def create_indexes(db: AsyncIOMotorDatabase) -> None:
         logger.warning(f"Index creation warning (may already exist): {e}")
 
 
-async def insert_items(db: AsyncIOMotorDatabase, items: List[ProductionItem]) -> int:
+async def _bulk_upsert(
+    collection: AsyncCollection,
+    items: List[ProductionItem],
+    updated_at: datetime,
+    semaphore: asyncio.Semaphore
+) -> int:
+    """
+    Upsert one chunk of production items as a single unordered bulk write.
+    
+    Args:
+        collection: Target production_items collection
+        items: Chunk of ProductionItem objects to upsert
+        updated_at: Timestamp to stamp on every item in the chunk
+        semaphore: Semaphore bounding the number of in-flight bulk writes
+        
+    Returns:
+        Number of items inserted or updated in this chunk
+    """
+    operations = []
+    # One pass of the compiled list serializer instead of a model_dump per item
+    item_dicts = _ITEMS_ADAPTER.dump_python(items)
+    for item, item_dict in zip(items, item_dicts):
+        item_dict['updated_at'] = updated_at
+        
+        # Lowercased shadow fields back the case-insensitive prefix filters
+        item_dict['style_lc'] = item.style.lower()
+        item_dict['order_number_lc'] = item.order_number.lower()
+        
+        operations.append(
+            UpdateOne(
+                {
+                    "order_number": item.order_number,
+                    "color": item.color
+                },
+                {"$set": item_dict},
+                upsert=True
+            )
+        )
+    
+    async with semaphore:
+        try:
+            result = await collection.bulk_write(operations, ordered=False)
+            return result.upserted_count + result.modified_count
+            
+        except BulkWriteError as e:
+            # Unordered writes keep going past failures; report what succeeded
+            details = e.details
+            
+            for error in details.get("writeErrors", []):
+                failed_item = items[error["index"]]
+                logger.warning(
+                    f"Failed to insert item {failed_item.order_number} - {failed_item.color}: "
+                    f"{error.get('errmsg')}"
+                )
+            
+            return details.get("nUpserted", 0) + details.get("nModified", 0)
+
+
+async def insert_items(db: AsyncDatabase, items: List[ProductionItem]) -> int:
     """
     Insert production items with upsert logic to prevent duplicates.
     
     Uses (order_number, color) as the unique key for upserting.
-    Updates the updated_at timestamp on every upsert.
+    Updates the updated_at timestamp on every upsert. Items are split into
+    chunks of INSERT_BATCH_SIZE, each sent as an unordered bulk write, with at
+    most INSERT_CONCURRENCY chunks in flight at once.
     
     Args:
-        db: AsyncIOMotorDatabase instance
+        db: AsyncDatabase instance
         items: List of ProductionItem objects to insert
         
     Returns:
         Number of items inserted or updated
     """
     collection = db.production_items
-    inserted_count = 0
+    
+    if not items:
+        return 0
     
     logger.info(f"Inserting {len(items)} production items...")
     
-    for item in items:
-        try:
-            item_dict = item.model_dump()
-            
-            item_dict['updated_at'] = datetime.utcnow()
-            
-            result = await collection.update_one(
-                {
-                    "order_number": item.order_number,
-                    "color": item.color
-                },
-                {"$set": item_dict},
-                upsert=True
-            )
-            
-            if result.upserted_id or result.modified_count:
-                inserted_count += 1
-                action = "inserted" if result.upserted_id else "updated"
-                logger.debug(f"✓ {action.capitalize()} item: {item.order_number} - {item.color}")
-                
-        except DuplicateKeyError as e:
-            logger.warning(f"Duplicate key for {item.order_number} - {item.color}: {e}")
-            continue
-        except Exception as e:
-            logger.error(f"Failed to insert item {item.order_number}: {e}")
-            continue
+    chunks = [
+        items[i:i + INSERT_BATCH_SIZE]
+        for i in range(0, len(items), INSERT_BATCH_SIZE)
+    ]
+    semaphore = asyncio.Semaphore(INSERT_CONCURRENCY)
+    now = datetime.utcnow()
+    
+    chunk_counts = await asyncio.gather(
+        *[_bulk_upsert(collection, chunk, now, semaphore) for chunk in chunks]
+    )
+    inserted_count = sum(chunk_counts)
     
     logger.info(f"✓ Inserted/updated {inserted_count} items out of {len(items)}")
     return inserted_count
 
 
+@functools.lru_cache(maxsize=256)
+def _prefix_regex(prefix: str) -> Regex:
+    """
+    Build (and memoize) an anchored BSON regex matching values starting with prefix.
+    
+    Dashboards poll with the same filters, so the escaped pattern is
+    built once per distinct prefix rather than on every request.
+    
+    Args:
+        prefix: Literal prefix to match (regex metacharacters are escaped)
+        
+    Returns:
+        BSON Regex usable directly as a query value
+    """
+    return Regex("^" + re.escape(prefix))
+
+
+def _build_filter_query(
+    style: Optional[str] = None,
+    status: Optional[str] = None,
+    order_number: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Build the MongoDB filter shared by item listing and counting.
+    
+    Style and order number filters are anchored prefix regexes against the
+    lowercased shadow fields (style_lc, order_number_lc) written on insert,
+    so MongoDB can answer them with an index range scan instead of
+    evaluating the regex against every key.
+    
+    Args:
+        style: Filter by style (case-insensitive prefix match)
+        status: Filter by exact status
+        order_number: Filter by order number (case-insensitive prefix match)
+        
+    Returns:
+        MongoDB query document
+    """
+    query = {}
+    
+    if style:
+        query["style_lc"] = _prefix_regex(style.lower())
+    
+    if status:
+        query["status"] = status
+    
+    if order_number:
+        query["order_number_lc"] = _prefix_regex(order_number.lower())
+    
+    return query
+
+
+def _status_hint(query: Dict[str, Any]) -> Optional[str]:
+    """
+    Pick the status index for a query filtered on status alone.
+    
+    Active statuses use the smaller active_status_id partial index, which
+    leaves out the bulk of completed and delayed items; other statuses use
+    the full status_created_id index. Both are ordered like PAGE_SORT.
+    
+    Args:
+        query: MongoDB filter built by _build_filter_query
+        
+    Returns:
+        Index name to hint, or None if the query isn't a status-only filter
+    """
+    if set(query) != {"status"}:
+        return None
+    return "active_status_id" if query["status"] in ACTIVE_STATUSES else "status_created_id"
+
+
 async def get_items(
-    db: AsyncIOMotorDatabase,
+    db: AsyncDatabase,
     skip: int = 0,
     limit: int = 100,
     style: Optional[str] = None,
     status: Optional[str] = None,
-    order_number: Optional[str] = None
+    order_number: Optional[str] = None,
+    after_created_at: Optional[datetime] = None,
+    after_id: Optional[ObjectId] = None
 ) -> List[Dict[str, Any]]:
     """
     Query production items with optional filters and pagination.
     
+    Only the fields in LIST_PROJECTION (plus _id) are returned. Passing the
+    (created_at, _id) of the last item seen switches to keyset pagination:
+    the query seeks straight past that item on the (created_at, _id) index
+    instead of scanning and discarding skipped entries.
+    
     Args:
-        db: AsyncIOMotorDatabase instance
+        db: AsyncDatabase instance
         skip: Number of items to skip (for pagination)
         limit: Maximum number of items to return
-        style: Filter by style (case-insensitive partial match)
+        style: Filter by style (case-insensitive prefix match)
         status: Filter by exact status
-        order_number: Filter by order number (case-insensitive partial match)
+        order_number: Filter by order number (case-insensitive prefix match)
+        after_created_at: created_at of the last item on the previous page
+        after_id: _id of the last item on the previous page
         
     Returns:
-        List of production item dictionaries
+        List of production item dictionaries (_id left as ObjectId)
     """
     collection = db.production_items
-    query = {}
+    query = _build_filter_query(style, status, order_number)
+    hint = _status_hint(query)
+    
+    if after_created_at is not None and after_id is not None:
+        # _id breaks ties between items created in the same millisecond
+        query["$or"] = [
+            {"created_at": {"$lt": after_created_at}},
+            {"created_at": after_created_at, "_id": {"$lt": after_id}}
+        ]
+    
+    logger.debug("Querying items with filters: %s, skip=%s, limit=%s", query, skip, limit)
+    
+    # Size the first batch to the page so it arrives in a single reply
+    cursor = (
+        collection.find(query, projection=LIST_PROJECTION, batch_size=limit, hint=hint)
+        .skip(skip)
+        .limit(limit)
+        .sort(PAGE_SORT)
+    )
+    items = await cursor.to_list(length=limit)
     
-    if style:
-        query["style"] = {"$regex": style, "$options": "i"}
+    logger.debug("Found %d items", len(items))
+    return items
+
+
+async def get_items_page(
+    db: AsyncDatabase,
+    skip: int = 0,
+    limit: int = 100,
+    style: Optional[str] = None,
+    status: Optional[str] = None,
+    order_number: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Query one page of production items together with the total match count.
     
-    if status:
-        query["status"] = status
+    Runs a single aggregation so the filter is evaluated once and a $facet
+    returns both the requested page and the number of matching items,
+    instead of a find plus a separate count_documents round trip. Without
+    filters the count comes from collection metadata instead, so the
+    default dashboard load never counts every document. Items are trimmed
+    to LIST_PROJECTION (plus _id).
     
-    if order_number:
-        query["order_number"] = {"$regex": order_number, "$options": "i"}
+    Args:
+        db: AsyncDatabase instance
+        skip: Number of items to skip (for pagination)
+        limit: Maximum number of items to return
+        style: Filter by style (case-insensitive prefix match)
+        status: Filter by exact status
+        order_number: Filter by order number (case-insensitive prefix match)
+        
+    Returns:
+        Dictionary with "items" (list of production item dictionaries, _id
+        left as ObjectId) and "total" (count of all items matching the filters)
+    """
+    collection = db.production_items
+    query = _build_filter_query(style, status, order_number)
     
-    logger.debug(f"Querying items with filters: {query}, skip={skip}, limit={limit}")
+    logger.debug("Querying item page with filters: %s, skip=%s, limit=%s", query, skip, limit)
     
-    cursor = collection.find(query).skip(skip).limit(limit).sort("created_at", -1)
-    items = await cursor.to_list(length=limit)
+    if not query:
+        # O(1) metadata count alongside an index-ordered page read
+        items, total = await asyncio.gather(
+            get_items(db, skip=skip, limit=limit),
+            collection.estimated_document_count()
+        )
+        logger.debug("Found %d items (estimated total: %d)", len(items), total)
+        return {"items": items, "total": total}
     
-    for item in items:
-        if "_id" in item:
-            item["_id"] = str(item["_id"])
+    pipeline = [
+        {"$match": query},
+        {"$sort": dict(PAGE_SORT)},
+        {"$project": LIST_PROJECTION},
+        {
+            "$facet": {
+                "items": [{"$skip": skip}, {"$limit": limit}],
+                "total": [{"$count": "count"}]
+            }
+        }
+    ]
     
-    logger.debug(f"Found {len(items)} items")
-    return items
+    hint = _status_hint(query)
+    if hint:
+        cursor = await collection.aggregate(pipeline, hint=hint)
+    else:
+        cursor = await collection.aggregate(pipeline)
+    results = await cursor.to_list(length=1)
+    facets = results[0]
+    
+    items = facets["items"]
+    total = facets["total"][0]["count"] if facets["total"] else 0
+    
+    logger.debug("Found %d items (total: %d)", len(items), total)
+    return {"items": items, "total": total}
 
 
-async def get_item_by_id(db: AsyncIOMotorDatabase, item_id: str) -> Optional[Dict[str, Any]]:
+async def get_item_by_id(db: AsyncDatabase, item_id: str) -> Optional[Dict[str, Any]]:
     """
     Retrieve a single production item by its MongoDB ObjectId.
     
     Args:
-        db: AsyncIOMotorDatabase instance
+        db: AsyncDatabase instance
         item_id: String representation of MongoDB ObjectId
         
     Returns:
-        Production item dictionary or None if not found
+        Production item dictionary (_id left as ObjectId) or None if not found
     """
     collection = db.production_items
     
+    if not ObjectId.is_valid(item_id):
+        logger.debug(f"Invalid item id {item_id!r}")
+        return None
+    
     try:
         obj_id = ObjectId(item_id)
-        item = await collection.find_one({"_id": obj_id})
+        item = await collection.find_one({"_id": obj_id}, SHADOW_FIELDS_PROJECTION)
         
         if item:
-            item["_id"] = str(item["_id"])
             logger.debug(f"Found item with id {item_id}")
             return item
         else:
             logger.debug(f"No item found with id {item_id}")
             return None
             
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error retrieving item {item_id}: {e}")
         return None
 
 
-async def delete_item(db: AsyncIOMotorDatabase, item_id: str) -> bool:
+async def delete_item(db: AsyncDatabase, item_id: str) -> bool:
     """
     Delete a production item by its MongoDB ObjectId.
     
     Args:
-        db: AsyncIOMotorDatabase instance
+        db: AsyncDatabase instance
         item_id: String representation of MongoDB ObjectId
         
     Returns:
@@ -190,6 +517,10 @@ async def delete_item(db: AsyncIOMotorDatabase, item_id: str) -> bool:
     """
     collection = db.production_items
     
+    if not ObjectId.is_valid(item_id):
+        logger.debug(f"Invalid item id {item_id!r}")
+        return False
+    
     try:
         obj_id = ObjectId(item_id)
         result = await collection.delete_one({"_id": obj_id})
@@ -201,13 +532,13 @@ async def delete_item(db: AsyncIOMotorDatabase, item_id: str) -> bool:
             logger.warning(f"No item found with id {item_id} to delete")
             return False
             
-    except Exception as e:
+    except PyMongoError as e:
         logger.error(f"Error deleting item {item_id}: {e}")
         return False
 
 
 async def get_total_count(
-    db: AsyncIOMotorDatabase,
+    db: AsyncDatabase,
     style: Optional[str] = None,
     status: Optional[str] = None,
     order_number: Optional[str] = None
@@ -216,40 +547,52 @@ async def get_total_count(
     Get total count of production items matching the filters.
     Useful for pagination calculations.
     
+    Without filters the count comes from collection metadata via
+    estimated_document_count. A single-field filter is hinted to the index
+    on that field (for status, the one picked by _status_hint).
+    
     Args:
-        db: AsyncIOMotorDatabase instance
-        style: Filter by style (case-insensitive partial match)
+        db: AsyncDatabase instance
+        style: Filter by style (case-insensitive prefix match)
         status: Filter by exact status
-        order_number: Filter by order number (case-insensitive partial match)
+        order_number: Filter by order number (case-insensitive prefix match)
         
     Returns:
         Total count of matching items
     """
     collection = db.production_items
-    query = {}
-    
-    if style:
-        query["style"] = {"$regex": style, "$options": "i"}
-    
-    if status:
-        query["status"] = status
-    
-    if order_number:
-        query["order_number"] = {"$regex": order_number, "$options": "i"}
-    
-    count = await collection.count_documents(query)
-    logger.debug(f"Total count with filters {query}: {count}")
+    query = _build_filter_query(style, status, order_number)
+    
+    if not query:
+        count = await collection.estimated_document_count()
+        logger.debug("Estimated total count: %d", count)
+        return count
+    
+    hint = _status_hint(query)
+    if hint is None and len(query) == 1:
+        hint = COUNT_HINTS.get(next(iter(query)))
+    if hint:
+        count = await collection.count_documents(query, hint=hint)
+    else:
+        count = await collection.count_documents(query)
+    logger.debug("Total count with filters %s: %d", query, count)
     
     return count
 
 
-async def get_status_counts(db: AsyncIOMotorDatabase) -> Dict[str, int]:
+async def get_status_counts(db: AsyncDatabase) -> Dict[str, int]:
     """
     Get count of items grouped by status.
     Useful for dashboard statistics.
     
+    Sorting on status first lets the planner walk the status index and
+    feed $group from index keys alone, instead of fetching every document.
+    This counts every status, so it hints the full status_created_id index;
+    the active_status_id partial index has no entries for completed or
+    delayed items.
+    
     Args:
-        db: AsyncIOMotorDatabase instance
+        db: AsyncDatabase instance
         
     Returns:
         Dictionary mapping status to count
@@ -257,14 +600,107 @@ async def get_status_counts(db: AsyncIOMotorDatabase) -> Dict[str, int]:
     collection = db.production_items
     
     pipeline = [
+        {"$sort": {"status": 1}},
         {"$group": {"_id": "$status", "count": {"$sum": 1}}},
         {"$sort": {"_id": 1}}
     ]
     
-    cursor = collection.aggregate(pipeline)
+    cursor = await collection.aggregate(pipeline, hint="status_created_id")
     results = await cursor.to_list(length=None)
     
     status_counts = {item["_id"]: item["count"] for item in results}
     
-    logger.debug(f"Status counts: {status_counts}")
+    logger.debug("Status counts: %s", status_counts)
     return status_counts
+
+
+async def get_cached_extraction(db: AsyncDatabase, key: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Look up a previously extracted sheet by its content hash.
+    
+    Args:
+        db: AsyncDatabase instance
+        key: Content hash of the serialized sheet
+        
+    Returns:
+        List of extracted item dictionaries, or None on a miss
+    """
+    try:
+        cached = await db.extraction_cache.find_one({"_id": key})
+    except PyMongoError as e:
+        logger.warning(f"Extraction cache lookup failed for {key}: {e}")
+        return None
+    
+    if cached:
+        logger.debug(f"Extraction cache hit for {key}")
+        return cached["items"]
+    
+    logger.debug(f"Extraction cache miss for {key}")
+    return None
+
+
+async def cache_extraction(db: AsyncDatabase, key: str, items: List[Dict[str, Any]]) -> None:
+    """
+    Store the extracted items for a sheet under its content hash.
+    
+    Entries expire after EXTRACTION_CACHE_TTL_SECONDS via a TTL index.
+    
+    Args:
+        db: AsyncDatabase instance
+        key: Content hash of the serialized sheet
+        items: Extracted item dictionaries
+    """
+    try:
+        await db.extraction_cache.update_one(
+            {"_id": key},
+            {"$set": {"items": items, "created_at": datetime.utcnow()}},
+            upsert=True
+        )
+        logger.debug(f"Cached extraction for {key}")
+    except PyMongoError as e:
+        logger.warning(f"Failed to cache extraction for {key}: {e}")
+
+
+async def get_schema_mapping(db: AsyncDatabase, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up the learned column mapping for a sheet layout.
+    
+    Args:
+        db: AsyncDatabase instance
+        fingerprint: Hash of the sheet's column labels
+        
+    Returns:
+        Column mapping dictionary, or None on a miss
+    """
+    try:
+        stored = await db.schema_mappings.find_one({"_id": fingerprint})
+    except PyMongoError as e:
+        logger.warning(f"Schema mapping lookup failed for {fingerprint}: {e}")
+        return None
+    
+    if stored:
+        logger.debug(f"Schema mapping hit for {fingerprint}")
+        return stored["mapping"]
+    
+    logger.debug(f"Schema mapping miss for {fingerprint}")
+    return None
+
+
+async def save_schema_mapping(db: AsyncDatabase, fingerprint: str, mapping: Dict[str, Any]) -> None:
+    """
+    Store the column mapping learned for a sheet layout.
+    
+    Args:
+        db: AsyncDatabase instance
+        fingerprint: Hash of the sheet's column labels
+        mapping: Column mapping dictionary
+    """
+    try:
+        await db.schema_mappings.update_one(
+            {"_id": fingerprint},
+            {"$set": {"mapping": mapping, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        logger.debug(f"Saved schema mapping for {fingerprint}")
+    except PyMongoError as e:
+        logger.warning(f"Failed to save schema mapping for {fingerprint}: {e}")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -28,6 +28,41 @@ class ProductionItemInput(BaseModel):
     required_weight: Optional[float] = None
 
 
+class DateColumnMapping(BaseModel):
+    """Sheet column label holding each production stage date (None if absent)"""
+    shipping: Optional[str] = None
+    fabric: Optional[str] = None
+    cutting: Optional[str] = None
+    sewing: Optional[str] = None
+    embroidery: Optional[str] = None
+    size_set: Optional[str] = None
+    vap: Optional[str] = None
+    feeding: Optional[str] = None
+
+
+class ColumnMapping(BaseModel):
+    """Sheet column label each ProductionItemInput field was read from"""
+    order_number: Optional[str] = None
+    style: Optional[str] = None
+    fabric: Optional[str] = None
+    color: Optional[str] = None
+    quantity: Optional[str] = None
+    dates: DateColumnMapping
+    supplier: Optional[str] = None
+    required_weight: Optional[str] = None
+
+
+class ProductionBatch(BaseModel):
+    """LLM response format for one sheet"""
+    items: List[ProductionItemInput]
+    column_mapping: Optional[ColumnMapping] = None
+
+
+class ProductionBatchMulti(BaseModel):
+    """LLM response format for several sheets, one batch per sheet in input order"""
+    sheets: List[ProductionBatch]
+
+
 class ProductionItem(BaseModel):
     """Complete model for MongoDB storage (with derived fields)"""
     order_number: str
@@ -1,26 +1,163 @@
+import asyncio
+import hashlib
+import importlib.util
 import logging
 import os
-from datetime import datetime
-from typing import List, Optional
+import re
+from concurrent.futures import Executor
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, Final, Iterable, List, Optional, Set, Tuple
 
+import numpy as np
+import orjson
 import pandas as pd
+from database import (
+    cache_extraction,
+    get_cached_extraction,
+    get_schema_mapping,
+    save_schema_mapping,
+)
 from dotenv import load_dotenv
-from models import ProductionDates, ProductionItem, ProductionItemInput
-from openai import OpenAI
-from pydantic import BaseModel
+from models import (
+    ColumnMapping,
+    ProductionBatch,
+    ProductionBatchMulti,
+    ProductionDates,
+    ProductionItem,
+    ProductionItemInput,
+)
+from openai import AsyncOpenAI
+from pymongo.asynchronous.database import AsyncDatabase
 from utils import format_date_iso, parse_date
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
 
+# Resolved once at import. Not required at startup: the dashboard and learned
+# column mappings work without it, so a missing key only fails LLM requests
+OPENAI_API_KEY: Final[Optional[str]] = os.getenv("OPENAI_API_KEY")
+
 logger = logging.getLogger(__name__)
 
+# Rust-backed calamine parses workbooks several times faster than openpyxl;
+# fall back to pandas' default engine when it isn't installed
+EXCEL_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
+
+# Sheet rows tried, in order, as the header row
+HEADER_ROW_CANDIDATES = (0, 1, 2)
+
+# Extraction runs on the smaller model; the larger one is retried once if it
+# refuses or extracts nothing
+PARSER_MODEL = os.getenv("PARSER_MODEL", "gpt-5-mini")
+PARSER_FALLBACK_MODEL = os.getenv("PARSER_FALLBACK_MODEL", "gpt-5")
+
+# Concurrent extractions arriving within this window share one LLM request
+EXTRACTION_BATCH_WINDOW = float(os.getenv("EXTRACTION_BATCH_WINDOW", "0.25"))
+EXTRACTION_BATCH_MAX_SHEETS = int(os.getenv("EXTRACTION_BATCH_MAX_SHEETS", "4"))
+
+
+# Header words for columns that never hold an extracted field. Only these are
+# dropped before serialization; anything unrecognised is left for the LLM.
+IRRELEVANT_COLUMN_PATTERN = re.compile(
+    r"remarks?|comments?|notes?|price|cost|\bfob\b|\brate\b|amount|buyer|merchandiser"
+    r"|image|photo|picture",
+    re.IGNORECASE
+)
+
+# Header words for the fields the LLM extracts (see SYSTEM_PROMPT). A column
+# whose header band mentions one is always kept, even if it also matches
+# IRRELEVANT_COLUMN_PATTERN (e.g. "Fabric Cost" sitting under a stage label).
+RELEVANT_COLUMN_PATTERN = re.compile(
+    r"order|\bio\b|job|number|\bno\b|#|style|fabric|colou?r|qty|quantity|date|plan"
+    r"|\bwt\b|weight|supplier|ship|handover|cutting|sewing|embroidery|size|vap|feeding",
+    re.IGNORECASE
+)
+
+
+def _header_labels(row: Iterable[Any]) -> List[Any]:
+    """
+    Build column labels from a raw sheet row the way pd.read_excel(header=...) does.
+    
+    Blank cells become "Unnamed: <position>" and repeated labels get ".1",
+    ".2", ... suffixes, so the result matches a header read by pandas.
+    
+    Args:
+        row: Raw sheet row holding the header cells
+        
+    Returns:
+        List of column labels
+    """
+    labels = [f"Unnamed: {position}" if pd.isna(value) else value for position, value in enumerate(row)]
+    unnamed = [position for position, value in enumerate(row) if pd.isna(value)]
+    named = [position for position in range(len(labels)) if position not in unnamed]
+    
+    # Same order and probing as pandas' header parser: named columns keep
+    # their labels before blank ones are numbered, and a suffix already used
+    # by a later header cell is skipped
+    counts: Dict[Any, int] = {}
+    for position in named + unnamed:
+        label = original = labels[position]
+        count = counts.get(label, 0)
+        
+        while count > 0:
+            counts[original] = count + 1
+            label = f"{original}.{count}"
+            if label in labels:
+                count += 1
+            else:
+                count = counts.get(label, 0)
+        
+        labels[position] = label
+        counts[label] = count + 1
+    
+    return labels
+
+
+def _select_relevant_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drop columns whose header band marks them as unrelated to extraction.
+    
+    Sheets often spread their header over a stage row and a field row, so
+    the promoted label alone may be "Unnamed: n"; the band is the label plus
+    the first few cells. A column is dropped only if its band matches
+    IRRELEVANT_COLUMN_PATTERN (remarks, prices, ...) and nothing in it
+    matches RELEVANT_COLUMN_PATTERN. Every other column reaches the LLM.
+    
+    Args:
+        df: DataFrame with production data
+        
+    Returns:
+        DataFrame without the irrelevant columns
+    """
+    band = df.head(len(HEADER_ROW_CANDIDATES))
+    dropped = []
+    
+    for position, label in enumerate(df.columns):
+        cells = [str(cell) for cell in (label, *band.iloc[:, position].dropna())]
+        if (
+            any(IRRELEVANT_COLUMN_PATTERN.search(cell) for cell in cells)
+            and not any(RELEVANT_COLUMN_PATTERN.search(cell) for cell in cells)
+        ):
+            dropped.append(position)
+    
+    if not dropped:
+        return df
+    
+    labels = [str(df.columns[position]) for position in dropped]
+    logger.info(f"Dropping {len(dropped)} columns unrelated to extraction: {labels}")
+    return df.drop(columns=df.columns[dropped])
+
 
 def read_excel_flexible(file_path: str) -> pd.DataFrame:
     """
     Read Excel with pandas, handling various header row positions.
     
-    Tries different header row positions (0, 1, 2) and returns the DataFrame
-    with the most valid columns. Also handles merged cells by forward-filling.
+    The sheet is parsed once without a header; only the first few rows
+    (HEADER_ROW_CANDIDATES) are probed as header candidates and the first
+    with enough valid columns is promoted in memory. Merged cells are left
+    empty (not forward-filled) so repeated values aren't re-sent to the LLM,
+    and columns known to be unrelated to the extracted fields are dropped.
+    Uses the calamine engine when python-calamine is installed.
     
     Args:
         file_path: Path to Excel file
@@ -33,43 +170,52 @@ def read_excel_flexible(file_path: str) -> pd.DataFrame:
     """
     logger.info(f"Reading Excel file: {file_path}")
     
-    # Try different header row positions (common patterns: 0, 1, 2)
-    for header_row in [0, 1, 2]:
-        try:
-            df = pd.read_excel(file_path, sheet_name=0, header=header_row)
-            
-            # Check if we got valid column names (not all NaN/None)
-            valid_columns = df.columns.notna().sum()
-            if valid_columns > 5:  # At least 5 valid columns
-                logger.info(f"Successfully read Excel with header at row {header_row}, {valid_columns} columns found")
-                
-                # Forward-fill NaN values from merged cells (common in color variants)
-                df = df.ffill()
-                
-                # Remove completely empty rows
-                df = df.dropna(how='all')
-                
-                logger.info(f"DataFrame shape after cleaning: {df.shape}")
-                return df
-                
-        except Exception as e:
-            logger.debug(f"Failed to read with header={header_row}: {e}")
-            continue
-    
-    # Fallback: read with no header and let LLM figure it out
-    logger.warning("Could not find valid header row, reading without header")
     try:
-        df = pd.read_excel(file_path, sheet_name=0, header=None)
-        df = df.ffill()
-        df = df.dropna(how='all')
-        return df
+        raw = pd.read_excel(file_path, sheet_name=0, header=None, dtype=object, engine=EXCEL_ENGINE)
     except Exception as e:
         raise ValueError(f"Failed to read Excel file: {e}")
+    
+    # Probe only the first few rows for a header (common patterns: 0, 1, 2)
+    probe = raw.head(len(HEADER_ROW_CANDIDATES))
+    for header_row, header_cells in zip(HEADER_ROW_CANDIDATES, probe.itertuples(index=False)):
+        columns = _header_labels(header_cells)
+        
+        # Check if we got valid column names (not all NaN/None)
+        valid_columns = pd.Index(columns).notna().sum()
+        if valid_columns > 5:  # At least 5 valid columns
+            logger.info(f"Successfully read Excel with header at row {header_row}, {valid_columns} columns found")
+            
+            df = raw.iloc[header_row + 1:]
+            df.columns = columns
+            
+            # Drop padding first (empty rows, then columns with no data) so
+            # nothing below touches it. Merged cells are left empty rather
+            # than forward-filled; the LLM payload treats an empty cell as
+            # "same as the row above"
+            df = df.dropna(how='all').dropna(axis=1, how='all')
+            
+            # Re-infer dtypes now that the header cells are out of each column
+            df = df.reset_index(drop=True).infer_objects()
+            df = _select_relevant_columns(df)
+            
+            logger.info(f"DataFrame shape after cleaning: {df.shape}")
+            return df
+    
+    # Fallback: no header row found, let LLM figure it out
+    logger.warning("Could not find valid header row, reading without header")
+    df = raw.dropna(how='all').dropna(axis=1, how='all')
+    return _select_relevant_columns(df)
+
 
+@lru_cache(maxsize=4096)
+def _parse_date_cached(date_str: str) -> Optional[datetime]:
+    """parse_date memoized on the raw string; sheets repeat the same dates a lot."""
+    return parse_date(date_str)
 
-def derive_status(dates: dict, shipping_date: Optional[str] = None) -> str:
+
+def derive_statuses(dates: List[dict], today: Optional[date] = None) -> List[str]:
     """
-    Derive production status from completion dates.
+    Derive production status from completion dates for a batch of items.
     
     Logic:
     - "pending": No stages started
@@ -77,93 +223,65 @@ def derive_status(dates: dict, shipping_date: Optional[str] = None) -> str:
     - "completed": All stages with dates are complete
     - "delayed": Past shipping date but not all stages complete
     
+    Parses every stage date of the batch in one pandas pass and derives
+    each status with array comparisons. Dates that aren't ISO fall back to
+    parse_date, memoized per distinct value.
+    
     Args:
-        dates: Dictionary of stage dates (can include None values)
-        shipping_date: Final shipping date (optional)
+        dates: Stage-date dictionaries, one per item
+        today: Reference date (defaults to today)
         
     Returns:
-        Status string
+        Status strings in the same order as dates
     """
-    today = datetime.now().date()
+    if not dates:
+        return []
     
-    # Get all non-null date values
-    date_values = [d for d in dates.values() if d]
+    today = np.datetime64(today or datetime.now().date(), "D")
     
-    if not date_values:
-        return "pending"
+    frame = pd.DataFrame(dates, dtype=object)
+    values = frame.to_numpy()
+    present = frame.notna().to_numpy() & values.astype(bool)
     
-    # Count completed stages (dates in the past)
-    completed_stages = []
-    future_stages = []
+    # One C-level parse for every stage date in the batch, truncated to days
+    days = np.full(values.shape, np.datetime64("NaT"), dtype="datetime64[D]")
+    parsed = pd.to_datetime(values[present], format="ISO8601", errors="coerce")
+    days[present] = parsed.to_numpy().astype("datetime64[D]")
     
-    for date_str in date_values:
-        if date_str:
-            parsed = parse_date(date_str)
-            if parsed:
-                if parsed.date() <= today:
-                    completed_stages.append(parsed)
-                else:
-                    future_stages.append(parsed)
+    # Non-ISO leftovers (rare; the LLM is asked for ISO) take the slow path
+    for row, col in np.argwhere(present & np.isnat(days)):
+        fallback = _parse_date_cached(values[row, col])
+        if fallback:
+            days[row, col] = np.datetime64(fallback.date(), "D")
     
-    total_stages = len(completed_stages) + len(future_stages)
+    known = ~np.isnat(days)
+    total = known.sum(axis=1)
+    completed = (known & (days <= today)).sum(axis=1)
     
-    # Check if delayed (past shipping date but not all complete)
-    if shipping_date:
-        shipping_parsed = parse_date(shipping_date)
-        if shipping_parsed and shipping_parsed.date() < today:
-            if len(completed_stages) < total_stages:
-                return "delayed"
+    if "shipping" in frame.columns:
+        shipping = days[:, frame.columns.get_loc("shipping")]
+        past_shipping = ~np.isnat(shipping) & (shipping < today)
+    else:
+        past_shipping = np.zeros(len(frame), dtype=bool)
     
-    # All stages complete
-    if total_stages > 0 and len(completed_stages) == total_stages:
-        return "completed"
-    
-    # Some stages complete
-    if len(completed_stages) > 0:
-        return "in_production"
-    
-    return "pending"
+    statuses = np.select(
+        [
+            past_shipping & (completed < total),
+            (total > 0) & (completed == total),
+            completed > 0,
+        ],
+        ["delayed", "completed", "in_production"],
+        default="pending"
+    )
+    return statuses.tolist()
 
 
-async def extract_production_items(df: pd.DataFrame, filename: str) -> List[ProductionItem]:
-    """
-    Use OpenAI Structured Outputs to extract and normalize production data.
-    
-    Uses gpt-4o model with structured outputs (parse method) to ensure
-    100% schema compliance. The LLM maps vendor-specific column names to
-    our canonical schema and standardizes date formats.
-    
-    Args:
-        df: DataFrame with production data
-        filename: Source filename for traceability
-        
-    Returns:
-        List of ProductionItem objects ready for MongoDB storage
-        
-    Raises:
-        ValueError: If LLM extraction fails or API key missing
-    """
-    logger.info(f"Extracting production items from {filename}")
-    
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key or api_key == "your_openai_api_key_here":
-        raise ValueError("OPENAI_API_KEY not set in environment variables")
-    
-    client = OpenAI(api_key=api_key)
-    
-    table_data = df.to_csv(index=False)
-    logger.debug(f"Table data size: {len(table_data)} characters")
-    
-    class ProductionBatch(BaseModel):
-        items: List[ProductionItemInput]
-    
-    try:
-        completion = client.beta.chat.completions.parse(
-            model="gpt-5",
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are an expert at extracting production planning data from textile manufacturing sheets.
+# Static instructions sent verbatim on every request. Keep per-request data
+# (sheet contents, filenames) out of the system message so the prompt prefix
+# stays byte-identical and eligible for OpenAI's automatic prompt caching.
+SYSTEM_PROMPT: Final[str] = """You are an expert at extracting production planning data from textile manufacturing sheets.
+
+Input format: each sheet is JSON-Lines. The first line is a JSON array of column headers; every following line is one sheet row as a JSON array of cell values, aligned with the headers.
 
 Your task:
 1. Parse the production order data regardless of column name variations
@@ -176,7 +294,7 @@ Your task:
 3. Extract all date fields under production stages (Fabric, Cutting, Sewing, Embroidery, Size Set, VAP, Feeding, etc.)
    - Look for columns with "Date", "Plan", "Planned Date", "Plan Date"
    - Map to appropriate stage in the dates object
-4. Handle merged cells - if style/fabric/color are empty or NaN, use value from previous row
+4. Handle merged cells - a null cell means "inherit the previous non-null value in this column"
 5. Standardize ALL dates to YYYY-MM-DD format (handle DD-MM-YY, DD/MM/YYYY, DD.MM.YYYY, etc.)
 6. Return ALL data rows as individual production items
 7. Extract supplier name if available (often in Cutting or Fabric columns)
@@ -187,49 +305,479 @@ IMPORTANT:
 - The shipping date should go in dates.shipping field
 - Production stage dates should go in their respective fields (dates.fabric, dates.cutting, etc.)
 - If you see multiple date columns per stage, prioritize the "Plan Date" or "Planned Date" columns
-- Quantity should be an integer (parse from string if needed)"""
+- Quantity should be an integer (parse from string if needed)
+
+COLUMN MAPPING:
+- Also return column_mapping: for every field, the column header (exactly as written in the sheet's first line) of the column you read it from
+- Use null for fields the sheet has no column for"""
+
+# Extends SYSTEM_PROMPT rather than rewording it, so batched requests share the cached prefix
+MULTI_SHEET_SYSTEM_PROMPT: Final[str] = SYSTEM_PROMPT + """
+
+MULTIPLE SHEETS:
+- The input contains several independent sheets, each introduced by a "=== Sheet N ===" line
+- Return one element in `sheets` per input sheet, in the same order as the input
+- Never mix rows from different sheets"""
+
+
+@lru_cache(maxsize=1)
+def _client() -> AsyncOpenAI:
+    """
+    Return the shared OpenAI client, so connections are kept alive across sheets.
+    
+    Raises:
+        ValueError: If OPENAI_API_KEY is not configured
+    """
+    if not OPENAI_API_KEY or OPENAI_API_KEY == "your_openai_api_key_here":
+        raise ValueError("OPENAI_API_KEY not set in environment variables")
+    return AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+
+async def _request_extraction(
+    sheets: List[str]
+) -> List[Tuple[List[ProductionItemInput], Optional[ColumnMapping]]]:
+    """
+    Run one OpenAI Structured Outputs request covering one or more sheets.
+    
+    A single sheet is sent exactly as before. Several sheets are sent in one
+    request with a schema holding one item list per sheet, in input order.
+    
+    Args:
+        sheets: Serialized sheets to extract (see _serialize_sheet)
+        
+    Returns:
+        One (items, column mapping) pair per input sheet, in the same order
+        
+    Raises:
+        ValueError: If the LLM refuses or returns the wrong number of sheets
+    """
+    client = _client()
+    
+    if len(sheets) == 1:
+        system_prompt = SYSTEM_PROMPT
+        user_prompt = f"Extract all production items from this sheet:\n\n{sheets[0]}"
+        response_format = ProductionBatch
+    else:
+        system_prompt = MULTI_SHEET_SYSTEM_PROMPT
+        sheet_blocks = "\n\n".join(
+            f"=== Sheet {index} ===\n{table_data}"
+            for index, table_data in enumerate(sheets, start=1)
+        )
+        user_prompt = f"Extract all production items from each of these {len(sheets)} sheets:\n\n{sheet_blocks}"
+        response_format = ProductionBatchMulti
+    
+    models = [PARSER_MODEL]
+    if PARSER_FALLBACK_MODEL and PARSER_FALLBACK_MODEL != PARSER_MODEL:
+        models.append(PARSER_FALLBACK_MODEL)
+    
+    for attempt, model in enumerate(models):
+        completion = await client.beta.chat.completions.parse(
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": system_prompt
                 },
                 {
                     "role": "user",
-                    "content": f"Extract all production items from this sheet:\n\n{table_data}"
+                    "content": user_prompt
                 }
             ],
-            response_format=ProductionBatch,  # Pass Pydantic model directly
+            response_format=response_format,  # Pass Pydantic model directly
         )
         
+        usage = completion.usage
+        if usage:
+            details = usage.prompt_tokens_details
+            cached_tokens = details.cached_tokens if details and details.cached_tokens else 0
+            logger.info(f"LLM prompt tokens ({model}): {usage.prompt_tokens} ({cached_tokens} cached)")
+        
         message = completion.choices[0].message
+        parsed = message.parsed
+        batches = ([parsed] if len(sheets) == 1 else parsed.sheets) if parsed else []
         
-        if message.parsed:
-            logger.info(f"Successfully extracted {len(message.parsed.items)} items")
+        if any(batch.items for batch in batches):
+            break
+        if attempt + 1 < len(models):
+            reason = "refused" if not parsed else "extracted no items"
+            logger.warning(f"{model} {reason}; retrying with {models[attempt + 1]}")
+    
+    if not parsed:
+        # Handle refusal
+        raise ValueError(f"LLM refused to parse: {message.refusal}")
+    
+    if len(batches) != len(sheets):
+        raise ValueError(
+            f"LLM returned {len(batches)} sheets for a batch of {len(sheets)}"
+        )
+    
+    return [(batch.items, batch.column_mapping) for batch in batches]
+
+
+class _ExtractionBatcher:
+    """
+    Coalesces concurrent sheet extractions into shared LLM requests.
+    
+    Sheets submitted within EXTRACTION_BATCH_WINDOW seconds of the first
+    waiting sheet (up to EXTRACTION_BATCH_MAX_SHEETS) go out as a single
+    request, so concurrent uploads share one network round trip and one
+    prompt prefill. Each caller gets its own sheet's items back. If a batched
+    request fails, each of its sheets is retried in a request of its own.
+    """
+    
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._collector: Optional[asyncio.Task] = None
+        self._dispatches: Set[asyncio.Task] = set()
+    
+    async def submit(
+        self,
+        table_data: str
+    ) -> Tuple[List[ProductionItemInput], Optional[ColumnMapping]]:
+        """Queue a sheet for extraction and wait for its items and column mapping."""
+        if self._collector is None or self._collector.done():
+            self._collector = asyncio.create_task(self._collect())
+        
+        future = self.loop.create_future()
+        await self._queue.put((table_data, future))
+        return await future
+    
+    async def _collect(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self.loop.time() + EXTRACTION_BATCH_WINDOW
+            
+            while len(batch) < EXTRACTION_BATCH_MAX_SHEETS:
+                timeout = deadline - self.loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
             
-            # Add derived fields and convert to ProductionItem
-            items = []
-            for item_data in message.parsed.items:
-                item_dict = item_data.model_dump()
-                
-                # Add metadata
-                item_dict['source_file'] = filename
-                
-                # Derive status from dates
-                dates_dict = item_dict['dates']
-                item_dict['status'] = derive_status(dates_dict, dates_dict.get('shipping'))
-                
-                items.append(ProductionItem(**item_dict))
+            # Don't wait for the request, so the next batch can start collecting
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+    
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        if len(batch) > 1:
+            logger.info(f"Sending {len(batch)} sheets in one extraction request")
+        
+        try:
+            results = await _request_extraction([table_data for table_data, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                # One bad sheet (or a miscounted response) shouldn't fail the
+                # others; give every sheet its own request
+                logger.warning(f"Batched extraction of {len(batch)} sheets failed ({e}); retrying each sheet alone")
+                await asyncio.gather(*(self._dispatch([entry]) for entry in batch))
+                return
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+_batcher: Optional[_ExtractionBatcher] = None
+
+
+def _get_batcher() -> _ExtractionBatcher:
+    """Return the extraction batcher bound to the running event loop."""
+    global _batcher
+    if _batcher is None or _batcher.loop is not asyncio.get_running_loop():
+        _batcher = _ExtractionBatcher()
+    return _batcher
+
+
+def _serialize_sheet(df: pd.DataFrame) -> str:
+    """
+    Serialize a sheet into the compact JSON-Lines payload sent to the LLM.
+    
+    The first line is a JSON array of column headers; every following line
+    is one sheet row as a JSON array of cell values. Empty cells (including
+    merged-cell continuations) become null, which the system prompt
+    defines as "inherit the value above", so fill-down runs cost one token
+    per cell instead of repeating the full value.
+    
+    Args:
+        df: DataFrame with production data
+        
+    Returns:
+        Header line followed by one line per row
+    """
+    values = df.to_numpy(dtype=object)
+    values[pd.isna(values)] = None
+    
+    lines = [orjson.dumps([str(column) for column in df.columns])]
+    lines.extend(
+        orjson.dumps(row, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+        for row in values.tolist()
+    )
+    return b"\n".join(lines).decode()
+
+
+# Cached extractions are stored in ProductionItemInput's shape, so a change
+# to that model has to miss entries cached under the old one
+ITEM_SCHEMA: Final[bytes] = orjson.dumps(
+    ProductionItemInput.model_json_schema(),
+    option=orjson.OPT_SORT_KEYS
+)
+
+
+def _extraction_cache_key(table_data: str) -> str:
+    """Hash the model, item schema, prompt and sheet payload; any change to them misses the cache."""
+    digest = hashlib.sha256()
+    digest.update(PARSER_MODEL.encode())
+    digest.update(b"\0")
+    digest.update(ITEM_SCHEMA)
+    digest.update(b"\0")
+    digest.update(SYSTEM_PROMPT.encode())
+    digest.update(b"\0")
+    digest.update(table_data.encode())
+    return digest.hexdigest()
+
+
+def _schema_fingerprint(df: pd.DataFrame) -> str:
+    """Hash the sheet's column labels; sheets from the same template share it."""
+    return hashlib.sha256(orjson.dumps([str(column) for column in df.columns])).hexdigest()
+
+
+def _cell_text(value: Any) -> Optional[str]:
+    """Cell value as stripped text (integral floats without ".0"), None if empty."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def _cell_number(value: Any) -> Optional[float]:
+    """Cell value as a number, None if empty. Raises ValueError if not numeric."""
+    text = _cell_text(value)
+    if text is None:
+        return None
+    return float(text.replace(",", ""))
+
+
+# Fields whose cells are typically merged down a block of rows. Only these
+# inherit the value above; order numbers, quantities and dates never do, so
+# subtotal rows can't be turned into copies of the item above them.
+MERGED_CELL_FIELDS = ("style", "fabric", "color", "supplier")
+
+# An item row states at least one of these itself (when the sheet has them)
+ITEM_KEY_FIELDS = ("style", "fabric", "color")
+
+
+def _apply_column_mapping(df: pd.DataFrame, mapping: ColumnMapping) -> List[ProductionItemInput]:
+    """
+    Extract items from a sheet with a learned column mapping, without the LLM.
+    
+    Merged-cell columns (MERGED_CELL_FIELDS) are forward-filled, so an
+    empty cell inherits the value above, and each row is converted the way
+    the LLM is asked to: numbers parsed from text, dates standardized to
+    ISO. A row only counts as an item if it has its own order number and
+    states at least one of ITEM_KEY_FIELDS itself; subtotal and total rows,
+    which carry a quantity under an inherited style, are skipped, as are
+    rows that don't validate, such as repeated header rows.
+    
+    Args:
+        df: DataFrame with production data
+        mapping: Column label for each field
+        
+    Returns:
+        List of extracted items; empty if the mapping doesn't fit the sheet
+    """
+    fields = mapping.model_dump()
+    date_fields = fields.pop("dates")
+    positions = {str(column): position for position, column in enumerate(df.columns)}
+    
+    labels = sorted({*fields.values(), *date_fields.values()} - {None}, key=str)
+    if not labels or not set(labels) <= positions.keys():
+        return []
+    
+    table = df.iloc[:, [positions[label] for label in labels]]
+    own_values = table.to_numpy(dtype=object)
+    own_values[pd.isna(own_values)] = None
+    filled_values = table.ffill().to_numpy(dtype=object)
+    filled_values[pd.isna(filled_values)] = None
+    index = {label: position for position, label in enumerate(labels)}
+    
+    inherited_labels = {fields[field] for field in MERGED_CELL_FIELDS}
+    key_labels = [fields[field] for field in ITEM_KEY_FIELDS if fields[field] is not None]
+    
+    items = []
+    for own_row, filled_row in zip(own_values.tolist(), filled_values.tolist()):
+        def cell(label: Optional[str]) -> Any:
+            if label is None:
+                return None
+            row = filled_row if label in inherited_labels else own_row
+            return row[index[label]]
+        
+        order_number = _cell_text(cell(fields["order_number"]))
+        if order_number is None:
+            continue
+        if key_labels and all(_cell_text(own_row[index[label]]) is None for label in key_labels):
+            continue
+        
+        try:
+            quantity = _cell_number(cell(fields["quantity"]))
+            if quantity is None or not quantity.is_integer():
+                continue
             
-            logger.info(f"Created {len(items)} ProductionItem objects")
-            return items
-        else:
-            # Handle refusal
-            error_msg = f"LLM refused to parse: {message.refusal}"
-            logger.error(error_msg)
-            raise ValueError(error_msg)
+            try:
+                required_weight = _cell_number(cell(fields["required_weight"]))
+            except ValueError:
+                required_weight = None
             
-    except Exception as e:
-        logger.error(f"LLM extraction failed: {e}")
-        raise
+            items.append(ProductionItemInput(
+                order_number=order_number,
+                style=_cell_text(cell(fields["style"])),
+                fabric=_cell_text(cell(fields["fabric"])),
+                color=_cell_text(cell(fields["color"])),
+                quantity=int(quantity),
+                dates=ProductionDates(**{
+                    stage: format_date_iso(cell(label))
+                    for stage, label in date_fields.items()
+                }),
+                supplier=_cell_text(cell(fields["supplier"])),
+                required_weight=required_weight
+            ))
+        except ValueError:
+            # Not an item row (repeated header, ...) or missing a required field
+            continue
+    
+    return items
+
+
+async def _learn_column_mapping(
+    db: AsyncDatabase,
+    df: pd.DataFrame,
+    mapping: Optional[ColumnMapping],
+    item_inputs: List[ProductionItemInput]
+) -> None:
+    """
+    Save the LLM's column mapping for this sheet layout if it's trustworthy.
+    
+    The mapping is only kept when replaying it with _apply_column_mapping
+    reproduces the LLM's items exactly, so later sheets with the same
+    columns get the same result without an LLM call.
+    
+    Args:
+        db: AsyncDatabase holding the schema mappings
+        df: DataFrame the items were extracted from
+        mapping: Column mapping reported by the LLM
+        item_inputs: Items the LLM extracted
+    """
+    if mapping is None or not item_inputs:
+        return
+    
+    replayed = _apply_column_mapping(df, mapping)
+    if [item.model_dump() for item in replayed] != [item.model_dump() for item in item_inputs]:
+        logger.info("Column mapping doesn't reproduce the LLM extraction; not saving it")
+        return
+    
+    await save_schema_mapping(db, _schema_fingerprint(df), mapping.model_dump())
+    logger.info("✓ Learned column mapping for this sheet layout")
+
+
+async def extract_production_items(
+    df: pd.DataFrame,
+    filename: str,
+    db: Optional[AsyncDatabase] = None
+) -> List[ProductionItem]:
+    """
+    Use OpenAI Structured Outputs to extract and normalize production data.
+    
+    Uses PARSER_MODEL (retrying on PARSER_FALLBACK_MODEL if it refuses or
+    extracts nothing) with structured outputs to ensure
+    100% schema compliance. The LLM maps vendor-specific column names to
+    our canonical schema and standardizes date formats. Sheets extracted
+    concurrently are batched into shared requests by _ExtractionBatcher.
+    Statuses are derived for the whole batch at once by derive_statuses.
+    When a database is given, non-empty extractions are cached by sheet
+    content so re-uploading an identical sheet skips the LLM call, and the
+    column mapping learned from a sheet is applied directly to later sheets
+    with the same column layout.
+    
+    Args:
+        df: DataFrame with production data
+        filename: Source filename for traceability
+        db: Optional AsyncDatabase holding the extraction cache and
+            learned column mappings
+        
+    Returns:
+        List of ProductionItem objects ready for MongoDB storage
+        
+    Raises:
+        ValueError: If LLM extraction fails or API key missing
+    """
+    logger.info(f"Extracting production items from {filename}")
+    
+    table_data = _serialize_sheet(df)
+    logger.debug("Table data size: %d characters", len(table_data))
+    
+    cache_key = _extraction_cache_key(table_data)
+    cached = await get_cached_extraction(db, cache_key) if db is not None else None
+    
+    # Sheets laid out like one seen before are extracted with its learned mapping
+    mapping = None
+    if cached is None and db is not None:
+        stored_mapping = await get_schema_mapping(db, _schema_fingerprint(df))
+        if stored_mapping is not None:
+            mapping = ColumnMapping.model_validate(stored_mapping)
+    
+    item_inputs = _apply_column_mapping(df, mapping) if mapping is not None else []
+    
+    if cached is not None:
+        item_inputs = [ProductionItemInput.model_validate(item) for item in cached]
+        logger.info(f"Reused {len(item_inputs)} cached items for identical sheet content")
+    elif item_inputs:
+        logger.info(f"Extracted {len(item_inputs)} items with the learned column mapping")
+    else:
+        try:
+            item_inputs, column_mapping = await _get_batcher().submit(table_data)
+        except Exception as e:
+            logger.error(f"LLM extraction failed: {e}")
+            raise
+        
+        logger.info(f"Successfully extracted {len(item_inputs)} items")
+        
+        if db is not None:
+            # An empty result is more likely a bad response than an empty
+            # sheet, so don't pin it for every later upload of this sheet
+            if item_inputs:
+                await cache_extraction(db, cache_key, [item.model_dump() for item in item_inputs])
+            await _learn_column_mapping(db, df, column_mapping, item_inputs)
+    
+    # Add derived fields and convert to ProductionItem
+    item_dicts = [item_data.model_dump() for item_data in item_inputs]
+    statuses = derive_statuses([item_dict['dates'] for item_dict in item_dicts])
+    
+    items = []
+    for item_dict, status in zip(item_dicts, statuses):
+        # Add metadata
+        item_dict['source_file'] = filename
+        item_dict['status'] = status
+        items.append(ProductionItem(**item_dict))
+    
+    logger.info(f"Created {len(items)} ProductionItem objects")
+    return items
 
 
-async def parse_production_sheet(file_path: str, filename: str) -> List[ProductionItem]:
+async def parse_production_sheet(
+    file_path: str,
+    filename: str,
+    executor: Optional[Executor] = None,
+    db: Optional[AsyncDatabase] = None
+) -> List[ProductionItem]:
     """
     Main entry point for parsing production planning Excel sheets.
     
@@ -241,6 +789,10 @@ async def parse_production_sheet(file_path: str, filename: str) -> List[Producti
     Args:
         file_path: Path to Excel file
         filename: Original filename for traceability
+        executor: Optional executor (e.g. a ProcessPoolExecutor) to run the
+            CPU-bound Excel read in; defaults to a worker thread so the read
+            never blocks the event loop
+        db: Optional AsyncDatabase used to cache LLM extractions
         
     Returns:
         List of ProductionItem objects ready for database storage
@@ -248,11 +800,15 @@ async def parse_production_sheet(file_path: str, filename: str) -> List[Producti
     logger.info(f"Starting parse pipeline for {filename}")
     
     # Step 1: Read Excel
-    df = read_excel_flexible(file_path)
+    if executor is not None:
+        loop = asyncio.get_running_loop()
+        df = await loop.run_in_executor(executor, read_excel_flexible, file_path)
+    else:
+        df = await asyncio.to_thread(read_excel_flexible, file_path)
     logger.info(f"Read {len(df)} rows from Excel")
     
     # Step 2: Extract with LLM
-    items = await extract_production_items(df, filename)
+    items = await extract_production_items(df, filename, db=db)
     
     logger.info(f"Parse pipeline complete: {len(items)} items extracted")
     return items
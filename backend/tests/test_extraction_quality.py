@@ -0,0 +1,39 @@
+"""
+Live extraction check against a hand-verified fixture.
+
+Calls the OpenAI API, so it only runs when OPENAI_API_KEY is set. Run it
+after changing PARSER_MODEL or the prompts to compare extraction quality.
+"""
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+from parser import OPENAI_API_KEY, parse_production_sheet
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+pytestmark = pytest.mark.skipif(
+    not OPENAI_API_KEY or OPENAI_API_KEY == "your_openai_api_key_here",
+    reason="OPENAI_API_KEY not set"
+)
+
+
+def test_tna_uno_matches_expected_items():
+    # The fixture lists only fields this sheet states unambiguously; its
+    # cutting and VAP groups have no single planned date to compare against
+    expected = json.loads((FIXTURES_DIR / "tna-uno.json").read_text())
+    
+    items = asyncio.run(parse_production_sheet(str(DATA_DIR / "tna-uno.xlsx"), "tna-uno.xlsx"))
+    extracted = {item.order_number: item.model_dump() for item in items}
+    
+    assert sorted(extracted) == sorted(item["order_number"] for item in expected)
+    for wanted in expected:
+        actual = extracted[wanted["order_number"]]
+        for field, value in wanted.items():
+            if field == "dates":
+                for stage, date in value.items():
+                    assert actual["dates"][stage] == date, (wanted["order_number"], stage)
+            else:
+                assert actual[field] == value, (wanted["order_number"], field)
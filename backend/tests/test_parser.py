@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+from models import ColumnMapping, DateColumnMapping
+from parser import _apply_column_mapping, _header_labels
+
+MAPPING = ColumnMapping(
+    order_number="PO",
+    style="Style",
+    fabric="Fabric",
+    color="Color",
+    quantity="Qty",
+    dates=DateColumnMapping(shipping="Ship Date"),
+)
+
+COLUMNS = ["PO", "Style", "Fabric", "Color", "Qty", "Ship Date"]
+
+
+def test_merged_style_and_fabric_are_inherited():
+    df = pd.DataFrame([
+        ["A-1", "S1", "Cotton", "Red", 100, "10/01/2026"],
+        ["A-2", None, None, "Blue", 200, "12/01/2026"],
+    ], columns=COLUMNS)
+    
+    items = _apply_column_mapping(df, MAPPING)
+    
+    assert [(i.order_number, i.style, i.fabric, i.color, i.quantity) for i in items] == [
+        ("A-1", "S1", "Cotton", "Red", 100),
+        ("A-2", "S1", "Cotton", "Blue", 200),
+    ]
+    assert items[1].dates.shipping == "2026-01-12"
+
+
+def test_subtotal_row_without_order_number_is_skipped():
+    df = pd.DataFrame([
+        ["A-1", "S1", "Cotton", "Red", 100, "10/01/2026"],
+        ["A-2", None, None, "Blue", 200, "12/01/2026"],
+        [None, None, None, None, 300, None],
+    ], columns=COLUMNS)
+    
+    items = _apply_column_mapping(df, MAPPING)
+    
+    assert [(i.order_number, i.color, i.quantity) for i in items] == [
+        ("A-1", "Red", 100),
+        ("A-2", "Blue", 200),
+    ]
+
+
+def test_total_row_with_only_inherited_fields_is_skipped():
+    df = pd.DataFrame([
+        ["A-1", "S1", "Cotton", "Red", 100, "10/01/2026"],
+        ["A-2", "S2", "Linen", "Blue", 200, "12/01/2026"],
+        ["Total", None, None, None, 300, None],
+    ], columns=COLUMNS)
+    
+    items = _apply_column_mapping(df, MAPPING)
+    
+    assert [i.order_number for i in items] == ["A-1", "A-2"]
+
+
+@pytest.mark.parametrize("row, expected", [
+    (["a", "a", "a.1", "a"], ["a", "a.2", "a.1", "a.3"]),
+    (["x", None, None, "x", "Unnamed: 1"], ["x", "Unnamed: 1.1", "Unnamed: 2", "x.1", "Unnamed: 1"]),
+])
+def test_header_labels_match_pandas(row, expected):
+    assert _header_labels(row) == expected
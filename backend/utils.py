@@ -1,4 +1,5 @@
 import logging
+import re
 from datetime import datetime
 from typing import Optional
 
@@ -6,6 +7,11 @@ from dateutil import parser as date_parser
 
 logger = logging.getLogger(__name__)
 
+# Day-first DD-MM-YY, DD/MM/YYYY, DD.MM.YYYY, ... as seen in production
+# sheets. ISO dates are handled by datetime.fromisoformat; anything else
+# falls back to dateutil.
+DAY_FIRST_DATE = re.compile(r"(\d{1,2})([-/.])(\d{1,2})\2(\d{4}|\d{2})")
+
 
 def parse_date(date_input: any) -> Optional[datetime]:
     """
@@ -31,11 +37,31 @@ def parse_date(date_input: any) -> Optional[datetime]:
         pass
     
     if isinstance(date_input, str):
+        text = date_input.strip()
+        
+        # Fast paths: ISO (what the LLM returns) and the known sheet formats
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            pass
+        
+        match = DAY_FIRST_DATE.fullmatch(text)
+        if match:
+            day, _, month, year = match.groups()
+            # Two-digit years pivot like strptime's %y (69-99 -> 19xx)
+            year_value = int(year)
+            if len(year) == 2:
+                year_value += 1900 if year_value >= 69 else 2000
+            try:
+                return datetime(year_value, int(month), int(day))
+            except ValueError:
+                pass
+        
         try:
-            parsed = date_parser.parse(date_input, dayfirst=True)
+            parsed = date_parser.parse(text, dayfirst=True)
             return parsed
         except Exception as e:
-            logger.warning(f"Failed to parse date '{date_input}': {e}")
+            logger.warning("Failed to parse date %r: %s", date_input, e)
             return None
     
     return None